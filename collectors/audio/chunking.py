@@ -1,52 +1,139 @@
 """
 Audio Chunking Utilities
-Extracted from friend's Whisper notebook - minimal changes
+Stream-copies WAV chunks with ffmpeg - no full in-memory decode
 """
-from pydub import AudioSegment
+import os
+import struct
+import subprocess
+from pathlib import Path
 from typing import List, Tuple
 
 
-def make_chunks_with_overlap(
+def get_audio_duration(audio_path: str) -> float:
+    """
+    Get WAV duration in seconds by parsing the RIFF header.
+
+    Only the header chunks are read (O(1)), never the PCM data itself.
+    Handles compressed formats via the `fact` chunk sample count, and
+    files with a bogus `data` chunk size by falling back to file size.
+    """
+    with open(audio_path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f"Not a RIFF/WAVE file: {audio_path}")
+
+        file_size = os.path.getsize(audio_path)
+        audio_format = None
+        sample_rate = None
+        byte_rate = None
+        block_align = None
+        fact_samples = None
+        data_size = None
+        data_offset = None
+
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                audio_format, _, sample_rate, byte_rate, block_align, _ = \
+                    struct.unpack('<HHIIHH', body[:16])
+            elif chunk_id == b'fact' and chunk_size >= 4:
+                fact_samples = struct.unpack('<I', f.read(4))[0]
+                f.seek(chunk_size - 4, 1)
+            elif chunk_id == b'data':
+                data_size = chunk_size
+                data_offset = f.tell()
+                f.seek(chunk_size, 1)
+            else:
+                f.seek(chunk_size, 1)
+
+            if chunk_size % 2:  # chunks are word-aligned
+                f.seek(1, 1)
+
+    if sample_rate is None or data_size is None:
+        raise ValueError(f"Missing fmt/data chunk in WAV file: {audio_path}")
+
+    # Non-PCM formats: the fact chunk carries the true sample count
+    if audio_format != 1 and fact_samples:
+        return fact_samples / sample_rate
+
+    # Some writers leave an invalid (too large) data size; trust the file
+    if data_offset + data_size > file_size:
+        data_size = file_size - data_offset
+
+    return data_size / byte_rate
+
+
+def make_chunks_ffmpeg(
     audio_path: str,
-    chunk_minutes: int = 5,
+    out_dir: str,
+    chunk_seconds: int = 300,
     overlap_seconds: int = 30,
-) -> List[Tuple[AudioSegment, float]]:
+) -> List[Tuple[str, float]]:
     """
-    Split audio into chunks with overlap.
-    
-    Returns list of (chunk_audio_segment, chunk_start_time_sec).
-    
-    - Each chunk is ~chunk_minutes long.
+    Split audio into chunk files on disk using ffmpeg stream copy.
+
+    Returns list of (chunk_path, chunk_start_time_sec).
+
+    - Each chunk is ~chunk_seconds long.
     - Each chunk (except the first) starts `overlap_seconds` earlier than the
       previous chunk ended.
-      
-    This is the exact code from friend's notebook.
+
+    ffmpeg copies the raw PCM stream (`-c copy`) instead of decoding and
+    re-encoding it, so memory stays constant regardless of file size.
+    Without overlap a single segment-muxer invocation writes every chunk;
+    with overlap each chunk is cut with its own seek (`-ss`), still copy-only.
     """
-    audio = AudioSegment.from_file(audio_path)
-    total_ms = len(audio)
+    total_sec = get_audio_duration(audio_path)
+    out_path = Path(out_dir)
 
-    chunk_ms = chunk_minutes * 60 * 1000
-    overlap_ms = overlap_seconds * 1000
+    if overlap_seconds <= 0:
+        # Single pass: the segment muxer writes all chunk files directly
+        subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                "-i", audio_path,
+                "-f", "segment",
+                "-segment_time", str(chunk_seconds),
+                "-reset_timestamps", "1",
+                "-c", "copy",
+                str(out_path / "chunk_%04d.wav"),
+            ],
+            check=True,
+        )
+        chunk_files = sorted(out_path.glob("chunk_*.wav"))
+        return [(str(p), float(i * chunk_seconds)) for i, p in enumerate(chunk_files)]
 
     chunks = []
-    start_ms = 0
+    start_sec = 0.0
+    idx = 0
+
+    while start_sec < total_sec:
+        end_sec = min(start_sec + chunk_seconds, total_sec)
+        chunk_path = str(out_path / f"chunk_{idx:04d}.wav")
 
-    while start_ms < total_ms:
-        end_ms = min(start_ms + chunk_ms, total_ms)
-        chunk = audio[start_ms:end_ms]
-        start_sec = start_ms / 1000.0
-        chunks.append((chunk, start_sec))
+        subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                "-ss", str(start_sec),
+                "-t", str(end_sec - start_sec),
+                "-i", audio_path,
+                "-c", "copy",
+                chunk_path,
+            ],
+            check=True,
+        )
+        chunks.append((chunk_path, start_sec))
 
-        if end_ms >= total_ms:
+        if end_sec >= total_sec:
             break
 
         # Move start of next chunk: end - overlap
-        start_ms = end_ms - overlap_ms
+        start_sec = end_sec - overlap_seconds
+        idx += 1
 
     return chunks
-
-
-def get_audio_duration(audio_path: str) -> float:
-    """Get audio duration in seconds"""
-    audio = AudioSegment.from_file(audio_path)
-    return len(audio) / 1000.0
@@ -4,31 +4,55 @@ Receives WAV files, chunks them, and stores to Azure Blob Storage
 
 Flow:
 1. Receive audio file upload
-2. Chunk audio using friend's algorithm (5 min chunks, 30s overlap)
+2. Chunk audio with ffmpeg stream copy (5 min chunks, no overlap)
 3. Upload chunks to Azure Blob Storage
 4. Store metadata in PostgreSQL
 5. Return upload_id for later processing
 """
 from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 import psycopg2
 from psycopg2 import pool
+from psycopg2.extras import execute_values
+import asyncio
 import os
+import re
 import uuid
 import tempfile
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob.aio import BlobServiceClient
 from dotenv import load_dotenv
 
 # Load environment variables from .env file (local development)
 load_dotenv()
 
-from chunking import make_chunks_with_overlap, get_audio_duration
+from chunking import make_chunks_ffmpeg, get_audio_duration
 
 # Global variables
 db_pool = None
 blob_service_client = None
+container_client = None
+
+AUDIO_CONTAINER = "audio-files"
+
+# Max chunk uploads in flight at once (network-bound, so concurrency ~= speedup)
+UPLOAD_CONCURRENCY = int(os.environ.get('AUDIO_UPLOAD_CONCURRENCY', '8'))
+
+
+def _tmp_dir() -> str | None:
+    """
+    Directory for staging uploads and chunks.
+
+    Point AUDIO_TMPDIR at a tmpfs (e.g. /dev/shm, with shm_size bumped
+    in the container) so the double write+read per upload hits RAM
+    instead of disk. Falls back to the system default when unset or
+    missing - note Docker's default /dev/shm is only 64 MiB, far too
+    small for 500 MB originals, so this is opt-in.
+    """
+    d = os.environ.get('AUDIO_TMPDIR')
+    return d if d and os.path.isdir(d) else None
 
 
 def init_db_pool():
@@ -43,10 +67,13 @@ def init_db_pool():
 
 def init_blob_client():
     """Initialize Azure Blob Storage client"""
-    global blob_service_client
+    global blob_service_client, container_client
     connection_string = os.environ.get('AZURE_STORAGE_CONNECTION_STRING')
     if connection_string:
         blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+        # One container client for the process: every upload shares its
+        # connection pool instead of opening a fresh TCP+TLS session
+        container_client = blob_service_client.get_container_client(AUDIO_CONTAINER)
 
 
 def get_db_connection():
@@ -110,8 +137,10 @@ async def lifespan(app: FastAPI):
         release_db_connection(conn)
     
     yield
-    
+
     # Shutdown
+    if blob_service_client:
+        await blob_service_client.close()
     if db_pool:
         db_pool.closeall()
         print("✓ Database connections closed")
@@ -121,25 +150,26 @@ app = FastAPI(
     title="Life Context - Audio Upload",
     description="Receives audio files, chunks them, and stores to Azure Blob",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 
+# Matches the 'YYYY-MM-DD_HH-MM-SS' part of filenames like
+# 'recording_2024-11-26_14-00-00.wav'
+_DT_RE = re.compile(r'(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})')
+
+
 def parse_datetime_from_filename(filename: str) -> datetime | None:
     """Try to extract datetime from filename like 'recording_2024-11-26_14-00-00.wav'"""
+    m = _DT_RE.search(filename)
+    if not m:
+        return None
     try:
-        # Common patterns in recording filenames
-        parts = filename.replace('.wav', '').replace('.WAV', '').split('_')
-        for i in range(len(parts) - 1):
-            try:
-                # Try parsing date_time pattern
-                dt_str = f"{parts[i]}_{parts[i+1]}"
-                return datetime.strptime(dt_str, "%Y-%m-%d_%H-%M-%S")
-            except:
-                continue
-    except:
-        pass
-    return None
+        return datetime.strptime(f"{m.group(1)}_{m.group(2)}", "%Y-%m-%d_%H-%M-%S")
+    except ValueError:
+        # Matched the shape but not a real date (e.g. month 13)
+        return None
 
 
 @app.post("/audio/upload/{member_id}")
@@ -148,7 +178,7 @@ async def upload_audio(member_id: str, file: UploadFile = File(...)):
     Upload audio file, chunk it, and store to Azure Blob
     
     - Accepts WAV files (up to 500MB)
-    - Chunks into 5-minute segments with 30s overlap
+    - Chunks into 5-minute segments (no overlap; VAD handles boundaries)
     - Stores chunks in Azure Blob Storage
     - Returns upload_id for later processing
     """
@@ -159,10 +189,15 @@ async def upload_audio(member_id: str, file: UploadFile = File(...)):
     upload_id = str(uuid.uuid4())
     recording_dt = parse_datetime_from_filename(file.filename)
     
-    # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-        content = await file.read()
-        tmp_file.write(content)
+    # Save uploaded file temporarily, streaming in 1 MiB blocks
+    # (a 500 MB WAV never sits fully in memory)
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav', dir=_tmp_dir()) as tmp_file:
+        while True:
+            blk = await file.read(1 << 20)
+            if not blk:
+                break
+            # Blocking disk write goes to the thread pool, not the event loop
+            await asyncio.to_thread(tmp_file.write, blk)
         tmp_path = tmp_file.name
     
     try:
@@ -170,66 +205,77 @@ async def upload_audio(member_id: str, file: UploadFile = File(...)):
         duration = get_audio_duration(tmp_path)
         
         # FIRST: Upload original file to Blob Storage (if configured)
-        container_name = "audio-files"
         dt_prefix = recording_dt.strftime("%Y-%m-%d_%H-%M-%S") if recording_dt else "unknown"
         original_blob_path = f"original/{dt_prefix}_{upload_id}.wav"
-        
-        if blob_service_client:
+
+        if container_client:
             try:
-                blob_client = blob_service_client.get_blob_client(
-                    container=container_name,
-                    blob=original_blob_path
-                )
+                blob_client = container_client.get_blob_client(original_blob_path)
                 with open(tmp_path, 'rb') as data:
-                    blob_client.upload_blob(data, overwrite=True)
+                    await blob_client.upload_blob(
+                        data,
+                        length=os.path.getsize(tmp_path),
+                        overwrite=True,
+                        max_concurrency=4
+                    )
                 print(f"✓ Uploaded original file: {original_blob_path}")
             except Exception as e:
                 print(f"Warning: Original file upload failed: {e}")
         
-        # THEN: Chunk the audio (using friend's code)
-        chunks = make_chunks_with_overlap(
+        # THEN: Chunk the audio (ffmpeg stream copy - no decode/re-encode)
+        chunk_dir = tempfile.mkdtemp(prefix='chunks_', dir=_tmp_dir())
+        # ffmpeg runs for a while on big files - keep it off the event loop
+        # No overlap: Whisper's VAD handles boundary silence, and
+        # overlapping chunks forced lossy dedup at transcription time
+        chunks = await asyncio.to_thread(
+            make_chunks_ffmpeg,
             tmp_path,
-            chunk_minutes=5,
-            overlap_seconds=30
+            chunk_dir,
+            chunk_seconds=300,
+            overlap_seconds=0
         )
-        
-        # Upload chunks to Azure Blob (if configured)
+
+        # Upload chunks to Azure Blob concurrently (if configured)
         chunk_records = []
-        
-        for idx, (chunk_audio, start_sec) in enumerate(chunks):
+        upload_tasks = []
+        sem = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+
+        async def upload_one(idx: int, chunk_path: str, blob_path: str):
+            """Upload a single chunk, bounded by the semaphore"""
+            async with sem:
+                try:
+                    blob_client = container_client.get_blob_client(blob_path)
+                    with open(chunk_path, 'rb') as data:
+                        await blob_client.upload_blob(data, overwrite=True, max_concurrency=4)
+                except Exception as e:
+                    print(f"Warning: Blob upload failed for chunk {idx}: {e}")
+
+        for idx, (chunk_path, start_sec) in enumerate(chunks):
             # Create chunk filename
             dt_prefix = recording_dt.strftime("%Y-%m-%d_%H-%M-%S") if recording_dt else "unknown"
             chunk_filename = f"{dt_prefix}_{upload_id}_chunk_{idx}.wav"
             blob_path = f"chunks/{chunk_filename}"
-            
-            # Save chunk to temp file
-            chunk_tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-            chunk_audio.export(chunk_tmp.name, format="wav")
-            
-            # Upload to Blob Storage (if configured)
-            if blob_service_client:
-                try:
-                    blob_client = blob_service_client.get_blob_client(
-                        container=container_name,
-                        blob=blob_path
-                    )
-                    with open(chunk_tmp.name, 'rb') as data:
-                        blob_client.upload_blob(data, overwrite=True)
-                except Exception as e:
-                    print(f"Warning: Blob upload failed for chunk {idx}: {e}")
-            
+
+            if container_client:
+                upload_tasks.append(upload_one(idx, chunk_path, blob_path))
+
             # Store chunk metadata
-            chunk_duration = len(chunk_audio) / 1000.0
+            chunk_duration = min(300.0, duration - start_sec)
             chunk_records.append({
                 'chunk_index': idx,
                 'start_time_sec': start_sec,
                 'duration_sec': chunk_duration,
                 'blob_path': blob_path
             })
-            
-            # Cleanup temp chunk file
-            os.unlink(chunk_tmp.name)
-        
+
+        if upload_tasks:
+            await asyncio.gather(*upload_tasks)
+
+        # Cleanup temp chunk files
+        for chunk_path, _ in chunks:
+            os.unlink(chunk_path)
+        os.rmdir(chunk_dir)
+
         # Store in database
         conn = get_db_connection()
         try:
@@ -242,14 +288,16 @@ async def upload_audio(member_id: str, file: UploadFile = File(...)):
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
             """, (upload_id, member_id, file.filename, recording_dt, duration, len(chunks), 'chunked'))
             
-            # Insert chunk records
-            for chunk in chunk_records:
-                cursor.execute("""
-                    INSERT INTO audio_chunks
-                    (upload_id, chunk_index, start_time_sec, duration_sec, blob_path)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (upload_id, chunk['chunk_index'], chunk['start_time_sec'], 
-                      chunk['duration_sec'], chunk['blob_path']))
+            # Insert all chunk records in one statement (one round-trip)
+            execute_values(cursor, """
+                INSERT INTO audio_chunks
+                (upload_id, chunk_index, start_time_sec, duration_sec, blob_path)
+                VALUES %s
+            """, [
+                (upload_id, chunk['chunk_index'], chunk['start_time_sec'],
+                 chunk['duration_sec'], chunk['blob_path'])
+                for chunk in chunk_records
+            ], page_size=200)
             
             conn.commit()
             cursor.close()
@@ -8,7 +8,14 @@ from fastapi.middleware.cors import CORSMiddleware
 # Import individual API apps
 from collectors.gps.main import app as gps_app
 from collectors.audio.main import app as audio_app
-from processors.whisper.main import app as whisper_app
+
+# Whisper transitively imports torch + CUDA libs (~1 GB, seconds of
+# startup); keep GPS and audio serving even where those aren't installed
+try:
+    from processors.whisper.main import app as whisper_app
+except ImportError as e:
+    print(f"⚠ Whisper API unavailable: {e}")
+    whisper_app = None
 
 # Create main application
 app = FastAPI(
@@ -29,7 +36,8 @@ app.add_middleware(
 # Mount all three APIs
 app.mount("/gps", gps_app)
 app.mount("/audio", audio_app)
-app.mount("/whisper", whisper_app)
+if whisper_app:
+    app.mount("/whisper", whisper_app)
 
 @app.get("/")
 async def root():
@@ -55,7 +63,7 @@ async def root():
 async def health():
     """Health check endpoint"""
     return {
-        "status": "healthy", 
+        "status": "healthy",
         "service": "Life Context API",
-        "available_apis": ["GPS", "Audio", "Whisper"]
+        "available_apis": ["GPS", "Audio"] + (["Whisper"] if whisper_app else [])
     }
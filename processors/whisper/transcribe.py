@@ -1,74 +1,175 @@
 """
 Whisper Transcription Core
-Extracted from friend's notebook - uses faster-whisper large-v3
+Extracted from friend's notebook - uses faster-whisper
 """
+import io
+import threading
+import numpy as np
 import torch
-from faster_whisper import WhisperModel
-from typing import List, Dict, Tuple
-import tempfile
+from faster_whisper import WhisperModel, BatchedInferencePipeline
+from faster_whisper.audio import decode_audio
+from typing import List, Dict, Tuple, Union
 import os
 
 # Global model instance (loaded once)
 _model = None
+_pipeline = None
+
+# Lazy loading happens on worker threads; without a lock two
+# near-simultaneous first requests would each load a ~3 GB model
+_load_lock = threading.Lock()
+
+# large-v3-turbo keeps the large-v3 encoder but prunes decoder layers:
+# ~2x faster with negligible quality loss on the translate task
+MODEL_ID = os.environ.get('WHISPER_MODEL', 'large-v3-turbo')
+
+# How many 30s segments go through the encoder per forward pass
+BATCH_SIZE = int(os.environ.get('WHISPER_BATCH_SIZE', '16'))
+
+# Decoder cost scales with beam width; 2 is adequate for large-v3-class
+# models and roughly halves decode time vs the old beam of 5
+BEAM_SIZE = int(os.environ.get('WHISPER_BEAM_SIZE', '2'))
+
+# Optional static prompt (glossary, names, spelling hints). Unlike the
+# old chained prev-tail prompt, it is identical for every chunk, so
+# chunks stay independent and batchable
+INITIAL_PROMPT = os.environ.get('WHISPER_INITIAL_PROMPT') or None
+
+
+def _pick_compute_type(device: str) -> str:
+    """
+    Resolve the CTranslate2 compute type.
+
+    WHISPER_COMPUTE_TYPE overrides (int8, int8_float16, float16,
+    bfloat16, ...); otherwise int8_float16 on GPU - quantized weights
+    suit the memory-bound decoder - and int8 on CPU.
+    """
+    requested = os.environ.get('WHISPER_COMPUTE_TYPE')
+    if requested:
+        return requested
+    return "int8_float16" if device == "cuda" else "int8"
+
+
+def model_loaded() -> bool:
+    """Whether this process has loaded the Whisper model yet"""
+    return _pipeline is not None
 
 
 def init_whisper_model():
     """
     Initialize Whisper model (call once at startup)
-    Uses large-v3 model with GPU if available
+    Uses WHISPER_MODEL (default large-v3-turbo) with GPU if available,
+    wrapped in a batched pipeline so VAD-split segments run through
+    the encoder together
     """
-    global _model
-    
-    if _model is not None:
-        return _model
-    
-    # Pick device + compute_type (from friend's code)
-    if torch.cuda.is_available():
-        device = "cuda"
-        compute_type = "int8_float16"  # good mix of speed + quality
-        print("✓ Using CUDA GPU for Whisper")
-    else:
-        device = "cpu"
-        compute_type = "int8"  # CPU will be slow, but works
-        print("⚠ Using CPU for Whisper (this will be slow)")
-    
-    _model = WhisperModel(
-        "large-v3",
-        device=device,
-        compute_type=compute_type,
+    global _model, _pipeline
+
+    if _pipeline is not None:
+        return _pipeline
+
+    # Double-checked: the caller that wins the lock loads the model,
+    # any that raced it wait and reuse the same instance
+    with _load_lock:
+        if _pipeline is not None:
+            return _pipeline
+
+        if torch.cuda.is_available():
+            device = "cuda"
+            print("✓ Using CUDA GPU for Whisper")
+        else:
+            device = "cpu"
+            print("⚠ Using CPU for Whisper (this will be slow)")
+
+        compute_type = _pick_compute_type(device)
+
+        model_kwargs = {}
+        if device == "cuda" and os.environ.get('WHISPER_FLASH_ATTENTION', '0') == '1':
+            # CTranslate2's fused flash-attention kernels; needs an
+            # Ampere-or-newer GPU, hence opt-in
+            model_kwargs['flash_attention'] = True
+
+        _model = WhisperModel(
+            MODEL_ID,
+            device=device,
+            compute_type=compute_type,
+            **model_kwargs,
+        )
+        _pipeline = BatchedInferencePipeline(model=_model)
+
+        print("✓ Whisper model loaded")
+        return _pipeline
+
+
+def decode_chunk_bytes(raw) -> np.ndarray:
+    """
+    Decode audio to the 16 kHz float32 waveform Whisper expects.
+
+    Accepts bytes, a readable file-like object, or a path/URL string
+    (PyAV streams HTTPS URLs directly, overlapping network and decode).
+    """
+    if isinstance(raw, (bytes, bytearray)):
+        raw = io.BytesIO(raw)
+    return decode_audio(raw, sampling_rate=16000)
+
+
+def is_silent(audio: np.ndarray, threshold: float = 0.001) -> bool:
+    """
+    Cheap all-silence check on a decoded waveform.
+
+    A mean-absolute pass over the samples costs microseconds; skipping
+    the model for a silent chunk saves a full encoder pass. VAD would
+    also discard the audio, but never invoking the model is cheaper.
+    """
+    return audio.size == 0 or float(np.abs(audio).mean()) < threshold
+
+
+def transcribe_waveform(audio: Union[str, np.ndarray]):
+    """
+    Start a batched transcription and return the lazy segment iterator.
+
+    The iterator decodes as it is consumed, so callers can persist
+    results incrementally instead of waiting for the whole recording.
+    Returns (segments_iter, info); info is available immediately.
+    """
+    pipeline = init_whisper_model()
+
+    # Batched run: VAD splits the audio into segments and BATCH_SIZE of
+    # them share each encoder forward instead of running one at a time
+    return pipeline.transcribe(
+        audio,
+        task="translate",  # any language -> English
+        beam_size=BEAM_SIZE,
+        vad_filter=True,
+        # Silero VAD trims silence before the encoder ever sees it;
+        # padding keeps word onsets at speech boundaries intact
+        vad_parameters=dict(min_silence_duration_ms=500, speech_pad_ms=200),
+        # Conditioning on previous text serializes decoding and is a
+        # known hallucination amplifier on long-form audio
+        condition_on_previous_text=False,
+        initial_prompt=INITIAL_PROMPT,
+        batch_size=BATCH_SIZE,
     )
-    
-    print("✓ Whisper model loaded")
-    return _model
 
 
 def transcribe_chunk_file(
-    chunk_path: str,
-    initial_prompt: str = None
+    audio: Union[str, np.ndarray]
 ) -> Tuple[str, List[Dict], str, float]:
     """
-    Transcribe a single audio chunk file using Whisper.
-    
+    Transcribe a single audio chunk using Whisper.
+
+    audio may be a decoded 16 kHz float32 waveform (no disk round-trip,
+    no FFmpeg subprocess) or a path for callers that still have files.
+
     Returns:
         - chunk_text: Full text for this chunk
         - segments: List of segments with timestamps
         - language: Detected language
         - language_probability: Confidence score
-        
+
     Based on friend's transcribe_with_5min_chunks function
     """
-    model = init_whisper_model()
-    
-    # Run transcription (from friend's code)
-    segments_iter, info = model.transcribe(
-        chunk_path,
-        task="translate",  # any language -> English
-        beam_size=5,
-        vad_filter=True,
-        condition_on_previous_text=True,
-        initial_prompt=initial_prompt or None,
-    )
-    
+    segments_iter, info = transcribe_waveform(audio)
+
     # Collect segments
     chunk_text_parts = []
     segments = []
@@ -94,41 +195,33 @@ def transcribe_chunk_file(
 
 
 def transcribe_audio_chunks(
-    chunk_paths: List[str],
-    overlap_seconds: int = 30,
-    prompt_tail_chars: int = 300
+    chunk_paths: List[str]
 ) -> Tuple[str, List[Dict], List[Dict]]:
     """
-    Transcribe multiple audio chunks with context carryover.
-    
+    Transcribe multiple audio chunks.
+
     Args:
         chunk_paths: List of paths to chunk files
-        overlap_seconds: Overlap duration for deduplication
-        prompt_tail_chars: Characters to carry forward as context
-    
+
     Returns:
         - full_text: Combined transcript
         - all_segments: All segments with global timestamps
         - language_per_chunk: Language info per chunk
-        
-    This is adapted from friend's transcribe_with_5min_chunks function
+
+    Chunks are expected to butt up against each other (no upload-time
+    overlap); VAD handles boundary silence, so no segments are dropped.
     """
     model = init_whisper_model()
     
     full_text_parts = []
     all_segments = []
     language_per_chunk = []
-    
-    prev_tail = ""  # for initial_prompt to next chunk
-    
+
     for idx, chunk_path in enumerate(chunk_paths):
         print(f"Processing chunk {idx+1}/{len(chunk_paths)}")
-        
+
         # Transcribe this chunk
-        chunk_text, segments, language, lang_prob = transcribe_chunk_file(
-            chunk_path,
-            initial_prompt=prev_tail or None
-        )
+        chunk_text, segments, language, lang_prob = transcribe_chunk_file(chunk_path)
         
         # Record language info
         language_per_chunk.append({
@@ -137,18 +230,11 @@ def transcribe_audio_chunks(
             "language_probability": lang_prob
         })
         
-        # For merging: skip overlap at start of chunk (except first chunk)
         chunk_text_for_merge = []
-        
+
         for seg in segments:
-            local_start = seg["start"]
-            
-            # Skip overlapped region at start (from friend's logic)
-            if idx > 0 and local_start < overlap_seconds:
-                continue
-            
             chunk_text_for_merge.append(seg["text"])
-            
+
             # Add to global segments
             all_segments.append({
                 "chunk_index": idx,
@@ -159,14 +245,7 @@ def transcribe_audio_chunks(
                 "language_probability": lang_prob
             })
         
-        chunk_text_merge = "".join(chunk_text_for_merge)
-        full_text_parts.append(chunk_text_merge)
-        
-        # Update tail prompt for next chunk
-        if chunk_text_merge:
-            prev_tail = chunk_text_merge[-prompt_tail_chars:]
-        elif chunk_text:
-            prev_tail = chunk_text[-prompt_tail_chars:]
-    
+        full_text_parts.append("".join(chunk_text_for_merge))
+
     full_text = "".join(full_text_parts)
     return full_text, all_segments, language_per_chunk